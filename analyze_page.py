@@ -1,48 +1,150 @@
+import argparse
 import asyncio
+import codecs
+import re
 import ssl
 import sys
+from itertools import islice
 
 try:
     import aiohttp
-    from bs4 import BeautifulSoup
+    from bs4 import BeautifulSoup, SoupStrainer
+    from lxml import etree
 except ImportError:
     print("缺少必要的依赖，正在安装...")
     import subprocess
     subprocess.check_call([
         "python", "-m", "pip", "install", 
-        "aiohttp", "beautifulsoup4"
+        "aiohttp", "beautifulsoup4", "lxml"
     ])
     import aiohttp
-    from bs4 import BeautifulSoup
+    from bs4 import BeautifulSoup, SoupStrainer
+    from lxml import etree
 
-async def fetch_and_analyze(url):
+# WebRTC关键字，预编译为单个正则，每个脚本只扫描一次
+WEBRTC_KEYWORDS = [
+    "RTCPeerConnection", "createOffer", "setLocalDescription",
+    "setRemoteDescription", "onicecandidate", "ontrack",
+    "addTransceiver", "addTrack", "getUserMedia"
+]
+_WEBRTC_RE = re.compile('|'.join(re.escape(k) for k in WEBRTC_KEYWORDS))
+
+# 包含URL或请求相关字样的整行，用于查找可能的API端点
+_URL_HINT_RE = re.compile(r'(?im)^.*(?:url|fetch|ajax|http).*$')
+
+# 预览内联脚本时把换行和制表符替换为空格
+_NL_TRANS = str.maketrans('\n\r\t', '   ')
+
+# 创建SSL上下文（忽略证书验证）
+SSL_CONTEXT = ssl.create_default_context()
+SSL_CONTEXT.check_hostname = False
+SSL_CONTEXT.verify_mode = ssl.CERT_NONE
+
+# 只解析需要分析的标签，避免构建无关的DOM子树
+ANALYZED_TAGS = SoupStrainer(['title', 'script', 'video', 'form', 'button', 'input', 'a'])
+
+def _response_encoding(response):
+    """返回响应头声明的编码，未声明或Python不支持时使用utf-8"""
+    charset = response.charset
+    if charset:
+        try:
+            codecs.lookup(charset)
+            return charset
+        except (LookupError, ValueError):
+            pass
+    return 'utf-8'
+
+class PageSummaryCollector:
+    """lxml解析器的回调目标，只收集标题和外部脚本地址，不构建任何树"""
+    
+    def __init__(self):
+        self.title_parts = []
+        self.scripts = []
+        self._in_title = False
+    
+    def start(self, tag, attrib):
+        if tag == 'title':
+            self._in_title = True
+        elif tag == 'script':
+            src = attrib.get('src')
+            if src:
+                self.scripts.append(src)
+    
+    def end(self, tag):
+        if tag == 'title':
+            self._in_title = False
+    
+    def data(self, data):
+        if self._in_title:
+            self.title_parts.append(data)
+    
+    def close(self):
+        title = ''.join(self.title_parts).strip() or None
+        return title, self.scripts
+
+def summarize_page(html):
+    """流式解析页面，返回 (标题, 外部脚本列表)"""
+    parser = etree.HTMLParser(target=PageSummaryCollector())
+    parser.feed(html)
+    return parser.close()
+
+async def fetch_and_analyze(url, quick=False):
     """获取并分析页面内容"""
     print(f"分析网页: {url}")
     
-    # 创建SSL上下文
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
-    
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, ssl=ssl_context) as response:
+        connector = aiohttp.TCPConnector(ssl=SSL_CONTEXT)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async with session.get(url) as response:
                 if response.status != 200:
                     print(f"获取页面失败: 状态码 {response.status}")
                     return
                 
-                html = await response.text()
+                # 按响应头声明的编码解码（缺省或无法识别时为utf-8），跳过字符集探测
+                html = (await response.read()).decode(_response_encoding(response), errors='replace')
                 print(f"成功获取页面，大小: {len(html)} 字节")
                 
-                # 解析HTML
-                soup = BeautifulSoup(html, 'html.parser')
+                # 快速模式：只提取标题和外部脚本
+                if quick:
+                    title, scripts = summarize_page(html)
+                    print(f"页面标题: {title or '无标题'}")
+                    print(f"发现 {len(scripts)} 个外部脚本")
+                    for i, src in enumerate(scripts):
+                        print(f"  外部脚本 {i+1}: {src}")
+                    return
+                
+                # 解析HTML（使用C实现的lxml解析器，html已解码为str，无需编码探测）
+                soup = BeautifulSoup(html, 'lxml', parse_only=ANALYZED_TAGS)
+                
+                # 只保留预览部分，尽早释放完整的页面文本
+                html_preview = html[:1000]
+                del html
                 
                 # 分析标题
                 title = soup.title.string if soup.title else "无标题"
                 print(f"页面标题: {title}")
                 
+                # 单次遍历DOM，按标签名分类
+                script_tags = []
+                video_tags = []
+                forms = []
+                buttons = []
+                for tag in soup.find_all(['script', 'video', 'form', 'button', 'input', 'a']):
+                    name = tag.name
+                    if name == 'script':
+                        script_tags.append(tag)
+                    elif name == 'video':
+                        video_tags.append(tag)
+                    elif name == 'form':
+                        forms.append(tag)
+                    elif name == 'button':
+                        buttons.append(tag)
+                    elif name == 'input' and tag.get('type') == 'button':
+                        buttons.append(tag)
+                    elif name == 'a' and 'button' in (tag.get('class') or []):
+                        buttons.append(tag)
+                
                 # 分析JavaScript文件
-                script_tags = soup.find_all('script')
                 print(f"发现 {len(script_tags)} 个脚本标签")
                 
                 for i, script in enumerate(script_tags):
@@ -52,63 +154,56 @@ async def fetch_and_analyze(url):
                     elif script.string:
                         # 如果是内联脚本，找WebRTC相关代码
                         code = script.string
-                        code_preview = code[:100].replace('\n', ' ') + "..." if len(code) > 100 else code
+                        code_preview = (code[:100].translate(_NL_TRANS) + "...") if len(code) > 100 else code.translate(_NL_TRANS)
                         print(f"  内联脚本 {i+1}: {code_preview}")
                         
                         # 查找WebRTC关键字
-                        webrtc_keywords = [
-                            "RTCPeerConnection", "createOffer", "setLocalDescription",
-                            "setRemoteDescription", "onicecandidate", "ontrack",
-                            "addTransceiver", "addTrack", "getUserMedia"
-                        ]
-                        
-                        found_keywords = []
-                        for keyword in webrtc_keywords:
-                            if keyword in code:
-                                found_keywords.append(keyword)
+                        found = set(_WEBRTC_RE.findall(code))
+                        found_keywords = [k for k in WEBRTC_KEYWORDS if k in found]
                         
                         if found_keywords:
                             print(f"    WebRTC相关代码: {', '.join(found_keywords)}")
                             
                             # 查找URL或API端点
-                            possible_urls = []
-                            lines = code.split('\n')
-                            for line in lines:
-                                if "url" in line.lower() or "fetch" in line.lower() or "ajax" in line.lower() or "http" in line.lower():
-                                    possible_urls.append(line.strip())
+                            possible_urls = [
+                                m.group(0).strip()
+                                for m in islice(_URL_HINT_RE.finditer(code), 5)  # 只显示前5个
+                            ]
                             
                             if possible_urls:
                                 print("    可能的API端点:")
-                                for url_line in possible_urls[:5]:  # 只显示前5个
+                                for url_line in possible_urls:
                                     print(f"      {url_line}")
                 
                 # 查找video标签
-                video_tags = soup.find_all('video')
                 print(f"发现 {len(video_tags)} 个视频标签")
                 for i, video in enumerate(video_tags):
                     print(f"  视频 {i+1}: ID='{video.get('id')}', Class='{video.get('class')}'")
                     
                 # 查找表单和输入框
-                forms = soup.find_all('form')
                 print(f"发现 {len(forms)} 个表单")
                 
                 # 查找按钮和控件
-                buttons = soup.find_all(['button', 'input[type="button"]', 'a.button'])
                 print(f"发现 {len(buttons)} 个按钮或控件")
                 
                 # 输出完整HTML供分析
                 print("\n页面HTML (前1000字符):")
-                print(html[:1000] + "...")
+                print(html_preview + "...")
                 
     except Exception as e:
         print(f"分析过程中出错: {e}")
 
 async def main():
-    # 目标URL
-    url = "https://123.56.22.103/players/play.html"
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description="WebRTC播放页面分析工具")
+    parser.add_argument("url", nargs="?", default="https://123.56.22.103/players/play.html",
+                        help="要分析的页面URL")
+    parser.add_argument("--quick", action="store_true", help="只提取标题和外部脚本（不构建DOM树）")
+    
+    args = parser.parse_args()
     
     try:
-        await fetch_and_analyze(url)
+        await fetch_and_analyze(args.url, quick=args.quick)
     except Exception as e:
         print(f"程序出错: {e}")
 
@@ -116,6 +211,13 @@ if __name__ == "__main__":
     # 为Windows设置事件循环策略
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    else:
+        # 其他平台优先使用uvloop事件循环（可选依赖）
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
     
     # 运行主函数
     asyncio.run(main())
\ No newline at end of file
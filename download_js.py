@@ -1,18 +1,37 @@
 import asyncio
+import re
 import ssl
 import sys
 import os
+from bisect import bisect_right
+from itertools import accumulate
 from urllib.parse import urljoin
 
 try:
     import aiohttp
+    import aiofiles
 except ImportError:
     print("缺少必要的依赖，正在安装...")
     import subprocess
     subprocess.check_call([
-        "python", "-m", "pip", "install", "aiohttp"
+        "python", "-m", "pip", "install", "aiohttp", "aiofiles"
     ])
     import aiohttp
+    import aiofiles
+
+# 关键词列表，预编译为单个正则，每行只扫描一次
+WEBRTC_KEYWORDS = [
+    "RTCPeerConnection", "createOffer", "setLocalDescription",
+    "setRemoteDescription", "onicecandidate", "ontrack",
+    "addTransceiver", "addTrack", "getUserMedia",
+    "WebRTC", "SDP", "ICE", "RTC", "newWebRTCUrl"
+]
+_WEBRTC_RE = re.compile('|'.join(re.escape(k) for k in WEBRTC_KEYWORDS))
+
+# 创建SSL上下文（忽略证书验证），所有下载共用一个
+SSL_CONTEXT = ssl.create_default_context()
+SSL_CONTEXT.check_hostname = False
+SSL_CONTEXT.verify_mode = ssl.CERT_NONE
 
 async def download_file(session, url, output_dir, base_url):
     """下载文件"""
@@ -26,24 +45,20 @@ async def download_file(session, url, output_dir, base_url):
     filename = url.split('/')[-1]
     output_path = os.path.join(output_dir, filename)
     
-    # 创建SSL上下文
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
-    
     try:
-        async with session.get(url, ssl=ssl_context) as response:
+        async with session.get(url) as response:
             if response.status != 200:
                 print(f"  下载失败: 状态码 {response.status}")
                 return None
             
-            content = await response.text()
-            
-            # 保存文件
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # 边接收边写入文件，不阻塞事件循环
+            size = 0
+            async with aiofiles.open(output_path, 'wb') as f:
+                async for chunk in response.content.iter_chunked(65536):
+                    await f.write(chunk)
+                    size += len(chunk)
                 
-            print(f"  已保存到: {output_path} (大小: {len(content)} 字节)")
+            print(f"  已保存到: {output_path} (大小: {size} 字节)")
             return output_path
             
     except Exception as e:
@@ -65,8 +80,9 @@ async def main():
         os.makedirs(output_dir)
         print(f"创建输出目录: {output_dir}")
     
-    # 下载文件
-    async with aiohttp.ClientSession() as session:
+    # 下载文件（允许对同一主机并发请求）
+    connector = aiohttp.TCPConnector(ssl=SSL_CONTEXT, limit=0, limit_per_host=16)
+    async with aiohttp.ClientSession(connector=connector) as session:
         tasks = []
         for js_file in js_files:
             task = download_file(session, js_file, output_dir, base_url)
@@ -81,34 +97,37 @@ async def main():
                 filename = os.path.basename(path)
                 print(f"\n分析: {filename}")
                 
-                with open(path, 'r', encoding='utf-8') as f:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
                     content = f.read()
                     
                 # 查找WebRTC相关代码
                 webrtc_snippets = []
+                seen_snippets = set()
                 
-                # 关键词列表
-                keywords = [
-                    "RTCPeerConnection", "createOffer", "setLocalDescription",
-                    "setRemoteDescription", "onicecandidate", "ontrack",
-                    "addTransceiver", "addTrack", "getUserMedia",
-                    "WebRTC", "SDP", "ICE", "RTC", "newWebRTCUrl"
-                ]
-                
-                # 按行查找关键字
+                # 在整个文件上查找关键字，通过行首偏移定位所在行
                 lines = content.split('\n')
-                for i, line in enumerate(lines):
-                    for keyword in keywords:
-                        if keyword in line:
-                            # 获取上下文
-                            start = max(0, i - 2)
-                            end = min(len(lines), i + 3)
-                            context = '\n'.join(lines[start:end])
-                            
-                            # 跳过重复的片段
-                            if not any(context in s for s in webrtc_snippets):
-                                webrtc_snippets.append(context)
-                                break
+                line_starts = list(accumulate((len(line) + 1 for line in lines[:-1]), initial=0))
+                pos = 0
+                while True:
+                    match = _WEBRTC_RE.search(content, pos)
+                    if not match:
+                        break
+                    i = bisect_right(line_starts, match.start()) - 1
+                    
+                    # 获取上下文
+                    start = max(0, i - 2)
+                    end = min(len(lines), i + 3)
+                    context = '\n'.join(lines[start:end])
+                    
+                    # 跳过重复的片段
+                    if context not in seen_snippets:
+                        seen_snippets.add(context)
+                        webrtc_snippets.append(context)
+                    
+                    # 每行只取一次，从下一行继续查找
+                    if i + 1 >= len(lines):
+                        break
+                    pos = line_starts[i + 1]
                 
                 # 显示找到的片段
                 if webrtc_snippets:
@@ -123,6 +142,13 @@ if __name__ == "__main__":
     # 为Windows设置事件循环策略
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    else:
+        # 其他平台优先使用uvloop事件循环（可选依赖）
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
     
     # 运行主函数
     asyncio.run(main())
\ No newline at end of file
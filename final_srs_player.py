@@ -8,6 +8,8 @@ import logging
 import time
 import re
 import signal
+import queue
+import threading
 import cv2
 import numpy as np
 from urllib.parse import urlparse, urljoin
@@ -27,6 +29,7 @@ try:
     from aiortc.mediastreams import MediaStreamTrack
     from aiortc.contrib.media import MediaPlayer, MediaRecorder, MediaBlackhole
     import av
+    from av.video.reformatter import VideoReformatter
 except ImportError:
     logger.error("缺少必要的依赖，正在安装...")
     import subprocess
@@ -38,44 +41,74 @@ except ImportError:
     from aiortc.mediastreams import MediaStreamTrack
     from aiortc.contrib.media import MediaPlayer, MediaRecorder, MediaBlackhole
     import av
+    from av.video.reformatter import VideoReformatter
+
+# 优先使用orjson解析JSON（可选依赖，其JSONDecodeError是json.JSONDecodeError的子类）
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 # 全局变量，用于控制程序退出
 exit_program = False
 
+# 帧率日志的记录间隔（纳秒）
+FPS_LOG_INTERVAL_NS = 1_000_000_000
+
+# 从页面中查找API URL的模式（按优先级排列，模块加载时编译一次）
+_API_URL_PATTERNS = tuple(re.compile(p) for p in (
+    r'var\s+url\s*=\s*"([^"]+)"',
+    r'url\s*:\s*"([^"]+)"',
+    r'api_server\s*=\s*"([^"]+)"',
+    r"'([^']*\/rtc\/.*?)'"
+))
+
 class VideoFrameProcessor(MediaStreamTrack):
     """处理视频帧的媒体流轨道"""
     
     kind = "video"
     
+    # 固定属性布局，recv热路径上的属性访问走槽位而非实例字典
+    __slots__ = (
+        'track', 'fps_target', 'display', 'last_log_ns', 'frame_count',
+        'codec_name', 'frame_size', 'window_name', 'reformatter',
+        '_display_q', '_display_stop', '_display_thread', '_event_loop'
+    )
+    
     def __init__(self, track, fps_target=30, display=False):
         super().__init__()
         self.track = track
         self.fps_target = fps_target
         self.display = display
-        self.last_log_time = time.time()
+        self.last_log_ns = time.perf_counter_ns()
         self.frame_count = 0
         self.codec_name = None
         self.frame_size = None
         self.window_name = "SRS WebRTC Player" if display else None
+        # 复用同一个swscale上下文做YUV->BGR转换，避免每帧重新创建
+        self.reformatter = VideoReformatter() if display else None
         
-        # 如果显示视频，创建窗口
+        # 如果显示视频，在独立线程中创建窗口并显示，避免OpenCV阻塞接收协程
+        self._display_q = None
+        self._display_stop = threading.Event()
+        self._display_thread = None
         if self.display:
-            cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
-            cv2.resizeWindow(self.window_name, 960, 540)
-            # 设置窗口关闭回调
-            cv2.setWindowProperty(self.window_name, cv2.WND_PROP_TOPMOST, 1)
+            self._event_loop = asyncio.get_running_loop()
+            self._display_q = queue.Queue(maxsize=1)
+            self._display_thread = threading.Thread(
+                target=self._display_loop, name="video-display", daemon=True
+            )
+            self._display_thread.start()
     
     async def recv(self):
-        global exit_program
-        
         # 如果窗口已关闭或程序需要退出，结束轨道
-        if exit_program or (self.display and not self._is_window_open()):
-            exit_program = True
+        if exit_program:
             self.stop()
             raise MediaStreamTrack.ended()
         
         frame = await self.track.recv()
-        self.frame_count += 1
+        frame_count = self.frame_count + 1
         
         # 记录编解码器和分辨率信息（仅一次）
         if self.codec_name is None:
@@ -86,39 +119,89 @@ class VideoFrameProcessor(MediaStreamTrack):
             self.frame_size = (frame.width, frame.height)
             logger.info(f"视频分辨率: {self.frame_size[0]}x{self.frame_size[1]}")
         
-        # 显示视频帧
+        # 将帧交给显示线程，显示跟不上时丢弃旧帧，只保留最新一帧
         if self.display and not exit_program:
+            display_q = self._display_q
             try:
-                # 将PyAV帧转换为OpenCV图像
-                img = frame.to_ndarray(format="bgr24")
-                
-                # 显示图像
-                cv2.imshow(self.window_name, img)
+                display_q.put_nowait(frame)
+            except queue.Full:
+                try:
+                    display_q.get_nowait()
+                except queue.Empty:
+                    pass
+                display_q.put_nowait(frame)
+        
+        # 每秒记录一次帧率（使用整数纳秒计时，仅在记录时做浮点除法）
+        now = time.perf_counter_ns()
+        elapsed_ns = now - self.last_log_ns
+        if elapsed_ns >= FPS_LOG_INTERVAL_NS:
+            if logger.isEnabledFor(logging.DEBUG):
+                fps = frame_count * 1e9 / elapsed_ns
+                logger.debug(f"视频帧率: {fps:.1f} fps")
+            frame_count = 0
+            self.last_log_ns = now
+        self.frame_count = frame_count
+        
+        return frame
+    
+    def _display_loop(self):
+        """显示线程：转换并显示视频帧，处理按键和窗口关闭"""
+        global exit_program
+        
+        try:
+            cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
+            cv2.resizeWindow(self.window_name, 960, 540)
+            # 设置窗口关闭回调
+            cv2.setWindowProperty(self.window_name, cv2.WND_PROP_TOPMOST, 1)
+        except cv2.error as e:
+            logger.error(f"无法创建视频窗口: {e}")
+            exit_program = True
+            self._trigger_program_exit()
+            return
+        
+        while not exit_program and not self._display_stop.is_set():
+            try:
+                frame = self._display_q.get(timeout=0.1)
+            except queue.Empty:
+                frame = None
+            
+            try:
+                if frame is not None:
+                    # 将PyAV帧转换为OpenCV图像
+                    img = self.reformatter.reformat(frame, format="bgr24").to_ndarray()
+                    
+                    # 显示图像
+                    cv2.imshow(self.window_name, img)
                 
                 # 检测按键，如果按下ESC键则退出
                 key = cv2.waitKey(1) & 0xFF
                 if key == 27:  # ESC键
                     logger.info("用户按下ESC键，准备退出...")
                     exit_program = True
-                    self.stop()
                     self._trigger_program_exit()
+                    break
             except cv2.error as e:
                 logger.warning(f"OpenCV错误: {e}")
                 if "无法识别的错误" in str(e) or "无效的窗口" in str(e):
                     exit_program = True
-                    self.stop()
                     self._trigger_program_exit()
+                    break
+            except Exception as e:
+                # 其他异常（如帧格式转换失败）会使显示线程无法继续，通知主循环退出
+                logger.error(f"显示视频帧时出错: {e}")
+                exit_program = True
+                self._trigger_program_exit()
+                break
+            
+            # 窗口被关闭时通知主循环退出
+            if not self._is_window_open():
+                exit_program = True
+                break
         
-        # 每秒记录一次帧率
-        current_time = time.time()
-        elapsed = current_time - self.last_log_time
-        if elapsed >= 1.0:
-            fps = self.frame_count / elapsed
-            logger.debug(f"视频帧率: {fps:.1f} fps")
-            self.frame_count = 0
-            self.last_log_time = current_time
-        
-        return frame
+        try:
+            cv2.destroyWindow(self.window_name)
+        except:
+            pass
     
     def _is_window_open(self):
         """检查窗口是否仍然打开"""
@@ -136,8 +219,8 @@ class VideoFrameProcessor(MediaStreamTrack):
         global exit_program
         exit_program = True
         logger.info("窗口已关闭，准备退出程序...")
-        # 使用asyncio的方式通知主循环退出
-        asyncio.get_event_loop().call_soon_threadsafe(
+        # 使用asyncio的方式通知主循环退出（可能在显示线程中调用）
+        self._event_loop.call_soon_threadsafe(
             lambda: asyncio.create_task(self._exit_soon())
         )
     
@@ -154,12 +237,14 @@ class VideoFrameProcessor(MediaStreamTrack):
             pass
     
     def stop(self):
-        """停止处理器并关闭任何窗口"""
-        if self.window_name and self.display:
-            try:
-                cv2.destroyWindow(self.window_name)
-            except:
-                pass
+        """停止处理器并关闭任何窗口（只发出停止信号，窗口由显示线程自行销毁）"""
+        self._display_stop.set()
+    
+    async def wait_closed(self, timeout=1.0):
+        """在线程池中等待显示线程退出，不阻塞事件循环"""
+        thread = self._display_thread
+        if thread is not None and thread is not threading.current_thread():
+            await asyncio.get_running_loop().run_in_executor(None, thread.join, timeout)
 
 class SRSWebRTCClient:
     def __init__(self, api_url=None, ice_servers=None, timeout=30):
@@ -199,54 +284,61 @@ class SRSWebRTCClient:
         self.closed = False
         self.recorder = None
         self.processors = []
+        
+        # ICE连接结果事件，由状态变更回调设置
+        self._ice_ready = asyncio.Event()
+        self._ice_failed = asyncio.Event()
+        
+        # 页面请求和offer请求共用的HTTP会话（首次使用时创建）
+        self._session = None
+
+    async def _get_session(self):
+        """获取共享的HTTP会话，保持与SRS服务器的连接复用"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(ssl=self.ssl_context, limit=8)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
 
     async def extract_api_url(self, webpage_url):
         """从网页中提取SRS WebRTC API URL"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(webpage_url, ssl=self.ssl_context) as response:
-                    if response.status != 200:
-                        raise Exception(f"无法加载网页，状态码: {response.status}")
-                    
-                    html = await response.text()
-                    
-                    # 尝试找到API URL的不同模式
-                    patterns = [
-                        r'var\s+url\s*=\s*"([^"]+)"',
-                        r'url\s*:\s*"([^"]+)"',
-                        r'api_server\s*=\s*"([^"]+)"',
-                        r"'([^']*\/rtc\/.*?)'"
-                    ]
-                    
-                    for pattern in patterns:
-                        matches = re.search(pattern, html)
-                        if matches:
-                            api_endpoint = matches.group(1)
-                            logger.info(f"从页面提取到API端点: {api_endpoint}")
-                            
-                            # 处理相对URL
-                            if not api_endpoint.startswith(('http://', 'https://')):
-                                parsed_url = urlparse(webpage_url)
-                                base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-                                api_endpoint = urljoin(base_url, api_endpoint)
-                            
-                            return api_endpoint
-                    
-                    # 如果没有匹配，使用默认SRS WebRTC端点
-                    # SRS通常在端口1985上提供API服务
-                    parsed_url = urlparse(webpage_url)
-                    base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-                    default_api = urljoin(base_url, "/rtc/v1/play/")
-                    
-                    # 尝试修改端口为1985（SRS的默认API端口）
-                    if ':' in parsed_url.netloc:
-                        host = parsed_url.netloc.split(':')[0]
-                        alt_api = f"{parsed_url.scheme}://{host}:1985/rtc/v1/play/"
-                        logger.info(f"未找到API端点，尝试默认URL: {alt_api}")
-                        return alt_api
-                    else:
-                        logger.info(f"未找到API端点，尝试默认URL: {default_api}")
-                        return default_api
+            session = await self._get_session()
+            async with session.get(webpage_url, ssl=self.ssl_context) as response:
+                if response.status != 200:
+                    raise Exception(f"无法加载网页，状态码: {response.status}")
+                
+                html = await response.text()
+                
+                # 尝试找到API URL的不同模式
+                for pattern in _API_URL_PATTERNS:
+                    matches = pattern.search(html)
+                    if matches:
+                        api_endpoint = matches.group(1)
+                        logger.info(f"从页面提取到API端点: {api_endpoint}")
+                        
+                        # 处理相对URL
+                        if not api_endpoint.startswith(('http://', 'https://')):
+                            parsed_url = urlparse(webpage_url)
+                            base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+                            api_endpoint = urljoin(base_url, api_endpoint)
+                        
+                        return api_endpoint
+                
+                # 如果没有匹配，使用默认SRS WebRTC端点
+                # SRS通常在端口1985上提供API服务
+                parsed_url = urlparse(webpage_url)
+                base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+                default_api = urljoin(base_url, "/rtc/v1/play/")
+                
+                # 尝试修改端口为1985（SRS的默认API端口）
+                if ':' in parsed_url.netloc:
+                    host = parsed_url.netloc.split(':')[0]
+                    alt_api = f"{parsed_url.scheme}://{host}:1985/rtc/v1/play/"
+                    logger.info(f"未找到API端点，尝试默认URL: {alt_api}")
+                    return alt_api
+                else:
+                    logger.info(f"未找到API端点，尝试默认URL: {default_api}")
+                    return default_api
         
         except Exception as e:
             logger.error(f"提取API URL时出错: {e}")
@@ -305,7 +397,10 @@ class SRSWebRTCClient:
         async def on_iceconnectionstatechange():
             self.ice_connection_state = self.peer_connection.iceConnectionState
             logger.info(f"ICE连接状态变更: {self.ice_connection_state}")
-            if self.ice_connection_state == "failed":
+            if self.ice_connection_state in ("connected", "completed"):
+                self._ice_ready.set()
+            elif self.ice_connection_state == "failed":
+                self._ice_failed.set()
                 await self.close()
         
         # 处理媒体轨道
@@ -350,81 +445,90 @@ class SRSWebRTCClient:
         await self.peer_connection.setLocalDescription(offer)
         
         # 准备发送给SRS服务器的JSON数据
-        data = {
-            "api": self.api_url,
-            "streamurl": stream_url,
-            "sdp": offer.sdp
-        }
+        payload = {"streamurl": stream_url, "sdp": offer.sdp}
         
         # 发送offer给SRS服务器
-        async with aiohttp.ClientSession() as session:
-            try:
-                logger.info(f"向服务器发送SDP offer")
+        session = await self._get_session()
+        try:
+            logger.info(f"向服务器发送SDP offer")
+            
+            async with session.post(
+                self.api_url, 
+                json=payload,
+                ssl=self.ssl_context
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"服务器响应错误 {response.status}: {error_text}")
+                    return False
                 
-                async with session.post(
-                    self.api_url, 
-                    json={"streamurl": stream_url, "sdp": offer.sdp},
-                    ssl=self.ssl_context
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"服务器响应错误 {response.status}: {error_text}")
-                        return False
+                # 解析响应
+                try:
+                    answer_data = await response.json(loads=_json_loads)
+                    logger.debug(f"服务器响应: {answer_data}")
                     
-                    # 解析响应
-                    try:
-                        answer_data = await response.json()
-                        logger.debug(f"服务器响应: {answer_data}")
-                        
-                        if "code" in answer_data and answer_data["code"] != 0:
-                            logger.error(f"SRS服务器返回错误码: {answer_data['code']}, 消息: {answer_data.get('msg', '未知错误')}")
-                            return False
-                            
-                        sdp = answer_data.get("sdp")
-                        if not sdp:
-                            logger.error("服务器响应中缺少SDP")
-                            return False
-                            
-                        # 设置远程描述
-                        answer = RTCSessionDescription(sdp=sdp, type="answer")
-                        await self.peer_connection.setRemoteDescription(answer)
-                        logger.info("成功设置远程描述")
-                        
-                        # 等待连接建立
-                        return await self.wait_for_connection()
+                    if "code" in answer_data and answer_data["code"] != 0:
+                        logger.error(f"SRS服务器返回错误码: {answer_data['code']}, 消息: {answer_data.get('msg', '未知错误')}")
+                        return False
                         
-                    except json.JSONDecodeError:
-                        response_text = await response.text()
-                        logger.error(f"无法解析JSON响应: {response_text[:200]}...")
+                    sdp = answer_data.get("sdp")
+                    if not sdp:
+                        logger.error("服务器响应中缺少SDP")
                         return False
                         
-            except Exception as e:
-                logger.error(f"连接过程中出错: {e}")
-                return False
+                    # 设置远程描述
+                    answer = RTCSessionDescription(sdp=sdp, type="answer")
+                    await self.peer_connection.setRemoteDescription(answer)
+                    logger.info("成功设置远程描述")
+                    
+                    # 等待连接建立
+                    return await self.wait_for_connection()
+                    
+                except json.JSONDecodeError:
+                    response_text = await response.text()
+                    logger.error(f"无法解析JSON响应: {response_text[:200]}...")
+                    return False
+                    
+        except Exception as e:
+            logger.error(f"连接过程中出错: {e}")
+            return False
     
     async def wait_for_connection(self, timeout=None):
         """等待连接建立或超时"""
         if timeout is None:
             timeout = self.timeout
             
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if self.peer_connection and (
-                self.peer_connection.iceConnectionState == "connected" or
-                self.peer_connection.iceConnectionState == "completed"
-            ):
-                logger.info(f"连接成功建立，耗时: {time.time() - self.connection_start_time:.2f}秒")
-                return True
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        waiters = [
+            asyncio.create_task(self._ice_ready.wait()),
+            asyncio.create_task(self._ice_failed.wait())
+        ]
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
                 
-            if self.peer_connection and self.peer_connection.iceConnectionState == "failed":
-                logger.error("ICE连接失败")
-                return False
+                # 等待状态变更事件，每5秒输出一次等待进度
+                await asyncio.wait(
+                    waiters, timeout=min(5, remaining), return_when=asyncio.FIRST_COMPLETED
+                )
                 
-            await asyncio.sleep(0.5)
-            
-            count = int(time.time() - start_time)
-            if count % 5 == 0 and count > 0:
-                logger.info(f"等待连接... ({count}秒)")
+                if self._ice_failed.is_set():
+                    logger.error("ICE连接失败")
+                    return False
+                    
+                if self._ice_ready.is_set():
+                    logger.info(f"连接成功建立，耗时: {time.time() - self.connection_start_time:.2f}秒")
+                    return True
+                
+                count = round(timeout - (deadline - loop.time()))
+                if count > 0 and loop.time() < deadline:
+                    logger.info(f"等待连接... ({count}秒)")
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
                 
         logger.error(f"连接超时，{timeout}秒后未建立连接")
         return False
@@ -441,6 +545,8 @@ class SRSWebRTCClient:
         for processor in self.processors:
             if hasattr(processor, 'stop'):
                 processor.stop()
+        for processor in self.processors:
+            await processor.wait_closed()
         
         # 关闭录制器（如果有）
         if self.recorder:
@@ -450,6 +556,10 @@ class SRSWebRTCClient:
         if self.peer_connection:
             await self.peer_connection.close()
             
+        # 关闭HTTP会话
+        if self._session:
+            await self._session.close()
+            
         # 输出连接统计信息
         if self.connection_start_time:
             duration = time.time() - self.connection_start_time
@@ -550,6 +660,13 @@ if __name__ == "__main__":
     # 为Windows设置事件循环策略
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    else:
+        # 其他平台优先使用uvloop事件循环（可选依赖）
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
     
     try:
         # 运行主函数
@@ -1,38 +1,103 @@
 import asyncio
+import atexit
+import codecs
 import json
 import sys
 import ssl
 import os
 import argparse
 import logging
+import logging.handlers
+import queue
 import time
 import re
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse, urljoin, parse_qs
 import ssl
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[logging.StreamHandler()]
-)
-logger = logging.getLogger(__name__)
+# 配置日志：使用独立的logger，不修改根logger；
+# 事件循环中只把记录放入队列，由后台线程负责格式化和写出
+_log_queue = queue.Queue(-1)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(message)s', datefmt='%H:%M:%S'))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+logger = logging.getLogger("srs_player")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+logger.propagate = False
 
 try:
     import aiohttp
-    from aiortc import RTCPeerConnection, RTCSessionDescription, RTCConfiguration, RTCIceServer
-    from aiortc.contrib.media import MediaPlayer, MediaRecorder
 except ImportError:
-    logger.error("缺少必要的依赖，正在安装...")
-    import subprocess
-    subprocess.check_call([
-        "python", "-m", "pip", "install", "aiortc", "aiohttp"
-    ])
-    import aiohttp
-    from aiortc import RTCPeerConnection, RTCSessionDescription, RTCConfiguration, RTCIceServer
-    from aiortc.contrib.media import MediaPlayer, MediaRecorder
+    logger.error("缺少依赖: pip install aiortc aiohttp")
+    sys.exit(1)
+
+# aiortc依赖树较大，延迟到首次创建客户端时再导入，--help等命令无需加载
+RTCPeerConnection = RTCSessionDescription = RTCConfiguration = RTCIceServer = None
+MediaPlayer = MediaRecorder = None
+
+def _import_aiortc():
+    """导入aiortc并缓存到模块全局变量（只在第一次调用时真正导入）"""
+    global RTCPeerConnection, RTCSessionDescription, RTCConfiguration, RTCIceServer
+    global MediaPlayer, MediaRecorder
+    
+    if RTCPeerConnection is not None:
+        return
+    
+    try:
+        from aiortc import RTCPeerConnection, RTCSessionDescription, RTCConfiguration, RTCIceServer
+        from aiortc.contrib.media import MediaPlayer, MediaRecorder
+    except ImportError:
+        logger.error("缺少依赖: pip install aiortc aiohttp")
+        sys.exit(1)
+
+# 优先使用orjson解析JSON（可选依赖；两者的解析错误都是ValueError，connect据此统一捕获）
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 从页面中查找API URL的模式（按优先级排列，模块加载时编译一次）
+_API_URL_PATTERNS = tuple(re.compile(p) for p in (
+    r'var\s+url\s*=\s*"([^"]+)"',
+    r'url\s*:\s*"([^"]+)"',
+    r'api_server\s*=\s*"([^"]+)"',
+    r"'([^']*\/api\/v1\/rtc\/.*?)'"
+))
+
+# 出现这些路径时认为URL本身就是SRS WebRTC API地址
+_API_URL_MARKERS = ('/rtc/v1/play', '/api/v1/rtc/')
+
+# 分块匹配时回看的字符数（即单个API URL匹配允许的最大长度）
+_API_URL_SCAN_OVERLAP = 2048
+
+def _response_encoding(response):
+    """返回响应头声明的编码，未声明或Python不支持时使用utf-8"""
+    charset = response.charset
+    if charset:
+        try:
+            codecs.lookup(charset)
+            return charset
+        except (LookupError, ValueError):
+            pass
+    return 'utf-8'
+
+def _search_api_url(html, pos=0):
+    """从pos开始按优先级查找API URL，未找到返回None"""
+    for pattern in _API_URL_PATTERNS:
+        matches = pattern.search(html, pos)
+        if matches:
+            return matches.group(1)
+    return None
 
 class SRSWebRTCClient:
+    # 所有客户端共用的SSL上下文和默认ICE服务器（首次创建客户端时初始化）
+    _DEFAULT_SSL_CONTEXT = None
+    _DEFAULT_ICE_SERVERS = None
+    
     def __init__(self, api_url=None, ice_servers=None, timeout=30):
         """
         初始化SRS WebRTC客户端
@@ -42,9 +107,13 @@ class SRSWebRTCClient:
             ice_servers: ICE服务器列表（如果为None，使用默认服务器）
             timeout: 连接超时时间（秒）
         """
+        _import_aiortc()
+        
         # 设置ICE服务器
         if ice_servers is None:
-            ice_servers = [RTCIceServer(urls=["stun:stun.l.google.com:19302"])]
+            if SRSWebRTCClient._DEFAULT_ICE_SERVERS is None:
+                SRSWebRTCClient._DEFAULT_ICE_SERVERS = [RTCIceServer(urls=["stun:stun.l.google.com:19302"])]
+            ice_servers = list(SRSWebRTCClient._DEFAULT_ICE_SERVERS)
         
         # 创建RTCConfiguration对象
         self.rtc_config = RTCConfiguration(iceServers=ice_servers)
@@ -55,10 +124,13 @@ class SRSWebRTCClient:
         # 存储连接超时时间
         self.timeout = timeout
         
-        # 创建SSL上下文（忽略证书验证）
-        self.ssl_context = ssl.create_default_context()
-        self.ssl_context.check_hostname = False
-        self.ssl_context.verify_mode = ssl.CERT_NONE
+        # 创建SSL上下文（忽略证书验证），只在第一次时加载证书
+        if SRSWebRTCClient._DEFAULT_SSL_CONTEXT is None:
+            ctx = ssl.create_default_context()
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+            SRSWebRTCClient._DEFAULT_SSL_CONTEXT = ctx
+        self.ssl_context = SRSWebRTCClient._DEFAULT_SSL_CONTEXT
         
         # 连接状态和统计信息
         self.connection_start_time = None
@@ -69,120 +141,175 @@ class SRSWebRTCClient:
         self.peer_connection = None
         self.closed = False
         self.recorder = None
+        self._parsed_page = None
+        
+        # ICE连接结果，由状态变更回调设置（连接成功或失败时触发事件）
+        self._ice_ready = asyncio.Event()
+        self._ice_failed = False
+        
+        # 连接失败或关闭时触发，用于提前结束播放等待
+        self._disconnected = asyncio.Event()
+        
+        # 正在运行的事件处理任务
+        self._handler_tasks = set()
+        
+        # 页面请求和offer请求共用的HTTP会话（首次使用时创建）
+        self._session = None
+
+    def _spawn_handler(self, coro):
+        """以任务方式运行事件处理协程，并跟踪到任务结束"""
+        task = asyncio.ensure_future(coro)
+        self._handler_tasks.add(task)
+        task.add_done_callback(self._handler_tasks.discard)
+        return task
 
-    async def extract_api_url(self, webpage_url):
-        """从网页中提取SRS WebRTC API URL"""
+    async def _get_session(self):
+        """获取共享的HTTP会话，保持与SRS服务器的连接复用"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=32,
+                ssl=self.ssl_context,
+                use_dns_cache=True,
+                ttl_dns_cache=300,
+                keepalive_timeout=30,
+                happy_eyeballs_delay=0.25
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def extract_api_url(self, webpage_url, parsed_url=None):
+        """从网页中提取SRS WebRTC API URL（parsed_url为已解析的webpage_url，可省略）"""
+        # 传入的已经是API地址时直接使用，无需请求页面
+        if any(marker in webpage_url for marker in _API_URL_MARKERS):
+            logger.info(f"URL本身即为API端点: {webpage_url}")
+            return webpage_url
+        
+        if parsed_url is None:
+            parsed_url = urlparse(webpage_url)
+        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(webpage_url, ssl=self.ssl_context) as response:
-                    if response.status != 200:
-                        raise Exception(f"无法加载网页，状态码: {response.status}")
-                    
-                    html = await response.text()
-                    
-                    # 尝试找到API URL的不同模式
-                    patterns = [
-                        r'var\s+url\s*=\s*"([^"]+)"',
-                        r'url\s*:\s*"([^"]+)"',
-                        r'api_server\s*=\s*"([^"]+)"',
-                        r"'([^']*\/api\/v1\/rtc\/.*?)'"
-                    ]
-                    
-                    for pattern in patterns:
-                        matches = re.search(pattern, html)
-                        if matches:
-                            api_endpoint = matches.group(1)
-                            logger.info(f"从页面提取到API端点: {api_endpoint}")
-                            
-                            # 处理相对URL
-                            if not api_endpoint.startswith(('http://', 'https://')):
-                                parsed_url = urlparse(webpage_url)
-                                base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-                                api_endpoint = urljoin(base_url, api_endpoint)
-                            
-                            return api_endpoint
+            session = await self._get_session()
+            async with session.get(webpage_url, ssl=self.ssl_context) as response:
+                if response.status != 200:
+                    raise Exception(f"无法加载网页，状态码: {response.status}")
+                
+                # 分块读取页面，边接收边匹配，找到API URL后立即返回
+                decoder = codecs.getincrementaldecoder(_response_encoding(response))(errors='replace')
+                html = ''
+                scan_from = 0
+                api_endpoint = None
+                async for chunk in response.content.iter_chunked(8192):
+                    html += decoder.decode(chunk)
+                    api_endpoint = _search_api_url(html, scan_from)
+                    if api_endpoint:
+                        break
+                    # 只回看可能跨块的末尾部分，避免重复扫描整个缓冲区
+                    scan_from = max(0, len(html) - _API_URL_SCAN_OVERLAP)
+                else:
+                    html += decoder.decode(b'', final=True)
+                    api_endpoint = _search_api_url(html, scan_from)
+                
+                if api_endpoint:
+                    logger.info(f"从页面提取到API端点: {api_endpoint}")
                     
-                    # 如果没有匹配，使用默认SRS WebRTC端点
-                    # SRS通常在端口1985上提供API服务
-                    parsed_url = urlparse(webpage_url)
-                    base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-                    default_api = urljoin(base_url, "/rtc/v1/play/")
+                    # 处理相对URL
+                    if not api_endpoint.startswith(('http://', 'https://')):
+                        base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+                        api_endpoint = urljoin(base_url, api_endpoint)
                     
-                    # 尝试修改端口为1985
-                    if ':' in parsed_url.netloc:
-                        host = parsed_url.netloc.split(':')[0]
-                        alt_api = f"{parsed_url.scheme}://{host}:1985/rtc/v1/play/"
-                        logger.info(f"未找到API端点，尝试默认URL: {alt_api}")
-                        return alt_api
-                    else:
-                        logger.info(f"未找到API端点，尝试默认URL: {default_api}")
-                        return default_api
+                    return api_endpoint
+                
+                # 如果没有匹配，使用默认SRS WebRTC端点
+                # SRS通常在端口1985上提供API服务
+                base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+                default_api = urljoin(base_url, "/rtc/v1/play/")
+                host = parsed_url.netloc.split(':')[0]
+                alt_api = f"{parsed_url.scheme}://{host}:1985/rtc/v1/play/"
+                
+                # 页面带端口时优先尝试1985端口，否则优先同一地址
+                if ':' in parsed_url.netloc:
+                    candidates = [alt_api, default_api]
+                else:
+                    candidates = [default_api, alt_api]
+                
+                api_endpoint = await self._probe_api_urls(candidates)
+                logger.info(f"未找到API端点，尝试默认URL: {api_endpoint}")
+                return api_endpoint
         
         except Exception as e:
             logger.error(f"提取API URL时出错: {e}")
             # 假设API默认位于同一服务器的/rtc/v1/play/路径
-            parsed_url = urlparse(webpage_url)
             base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
             default_api = urljoin(base_url, "/rtc/v1/play/")
             logger.info(f"使用默认API URL: {default_api}")
             return default_api
 
-    async def connect(self, webpage_url, stream_url=None):
-        """连接到SRS WebRTC服务器并播放指定的流"""
-        # 记录开始时间
-        self.connection_start_time = time.time()
+    async def _probe_api_urls(self, candidates, timeout=2):
+        """并发探测候选API地址，返回第一个可访问的地址（都不可访问时返回第一个候选）"""
+        candidates = list(dict.fromkeys(candidates))
+        session = await self._get_session()
         
-        # 如果未提供API URL，从网页URL提取
-        if self.api_url is None:
-            self.api_url = await self.extract_api_url(webpage_url)
-            
-        logger.info(f"使用API URL: {self.api_url}")
-        
-        # 如果未提供流URL，尝试从页面URL或API URL中提取
-        if stream_url is None:
-            parsed_api = urlparse(self.api_url)
-            parsed_page = urlparse(webpage_url)
-            
-            # 尝试从查询参数中提取流名称
-            query_params = parsed_page.query.split('&')
-            for param in query_params:
-                if param.startswith('stream='):
-                    stream_url = param.split('=', 1)[1]
-                    break
-            
-            # 如果仍未找到，使用默认流名
-            if not stream_url:
-                stream_url = "livestream"
-            
-            logger.info(f"使用流URL: {stream_url}")
+        async def probe(url):
+            try:
+                async with session.head(
+                    url, ssl=self.ssl_context, timeout=aiohttp.ClientTimeout(total=timeout)
+                ) as response:
+                    # 只要服务器有响应（非5xx）就认为地址可达
+                    return response.status < 500
+            except Exception:
+                return False
         
+        results = await asyncio.gather(*(probe(url) for url in candidates))
+        return next((url for url, ok in zip(candidates, results) if ok), candidates[0])
+
+    async def _build_pc_and_offer(self):
+        """创建RTCPeerConnection、设置事件处理器并生成本地offer"""
         # 创建RTCPeerConnection
         self.peer_connection = RTCPeerConnection(configuration=self.rtc_config)
         
-        # 设置事件处理器
-        @self.peer_connection.on("connectionstatechange")
-        async def on_connectionstatechange():
+        # 设置事件处理器（异步处理逻辑通过_spawn_handler运行，以便close()时取消）
+        async def handle_connectionstatechange():
             self.connection_state = self.peer_connection.connectionState
             logger.info(f"连接状态变更: {self.connection_state}")
+            if self.connection_state in ("failed", "closed"):
+                self._disconnected.set()
             if self.connection_state == "failed":
                 await self.close()
         
-        @self.peer_connection.on("iceconnectionstatechange")
-        async def on_iceconnectionstatechange():
+        async def handle_iceconnectionstatechange():
             self.ice_connection_state = self.peer_connection.iceConnectionState
             logger.info(f"ICE连接状态变更: {self.ice_connection_state}")
-            if self.ice_connection_state == "failed":
+            if self.ice_connection_state in ("connected", "completed"):
+                self._ice_ready.set()
+            elif self.ice_connection_state == "failed":
+                self._ice_failed = True
+                self._ice_ready.set()
                 await self.close()
         
+        @self.peer_connection.on("connectionstatechange")
+        def on_connectionstatechange():
+            self._spawn_handler(handle_connectionstatechange())
+        
+        @self.peer_connection.on("iceconnectionstatechange")
+        def on_iceconnectionstatechange():
+            self._spawn_handler(handle_iceconnectionstatechange())
+        
         # 处理媒体轨道
         @self.peer_connection.on("track")
         def on_track(track):
             logger.info(f"收到轨道: {track.kind}")
-            self.track_stats[track.kind] = {"start_time": time.time(), "frames": 0}
+            self.track_stats[track.kind] = {"start_time": time.monotonic(), "frames": 0}
             
-            @track.on("ended")
-            async def on_ended():
+            async def handle_ended():
                 logger.info(f"轨道结束: {track.kind}")
+            
+            @track.on("ended")
+            def on_ended():
+                self._spawn_handler(handle_ended())
                 
             if track.kind == "video":
                 # 如果需要，可以在这里设置视频录制
@@ -192,93 +319,114 @@ class SRSWebRTCClient:
         offer = await self.peer_connection.createOffer()
         await self.peer_connection.setLocalDescription(offer)
         
+        return offer
+
+    async def _run_together(self, *coros):
+        """并发运行协程并返回结果列表；任一失败（或自身被取消）时取消并等待其余任务"""
+        tasks = [asyncio.ensure_future(coro) for coro in coros]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def connect(self, webpage_url, stream_url=None):
+        """连接到SRS WebRTC服务器并播放指定的流"""
+        # 记录开始时间
+        self.connection_start_time = time.monotonic()
+        
+        # 页面URL只解析一次，后续提取API URL和流名称时复用
+        self._parsed_page = urlparse(webpage_url)
+        
+        # 如果未提供API URL，从网页URL提取；页面请求与offer生成互不依赖，并发执行
+        if self.api_url is None:
+            self.api_url, offer = await self._run_together(
+                self.extract_api_url(webpage_url, self._parsed_page),
+                self._build_pc_and_offer()
+            )
+        else:
+            offer = await self._build_pc_and_offer()
+            
+        logger.info(f"使用API URL: {self.api_url}")
+        
+        # 如果未提供流URL，尝试从页面URL或API URL中提取
+        if stream_url is None:
+            # 尝试从查询参数中提取流名称
+            stream_url = parse_qs(self._parsed_page.query).get('stream', [None])[0]
+            
+            # 如果仍未找到，使用默认流名
+            if not stream_url:
+                stream_url = "livestream"
+            
+            logger.info(f"使用流URL: {stream_url}")
+        
         # 准备发送给SRS服务器的JSON数据
-        data = {
-            "api": self.api_url,
-            "streamurl": stream_url,
-            "sdp": offer.sdp
-        }
+        payload = {"streamurl": stream_url, "sdp": offer.sdp}
         
         # 发送offer给SRS服务器
-        async with aiohttp.ClientSession() as session:
-            try:
-                logger.info(f"向服务器发送SDP offer")
+        session = await self._get_session()
+        try:
+            logger.info(f"向服务器发送SDP offer")
+            
+            async with session.post(
+                self.api_url, 
+                json=payload,
+                ssl=self.ssl_context
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"服务器响应错误 {response.status}: {error_text}")
+                    return False
                 
-                async with session.post(
-                    self.api_url, 
-                    json={"streamurl": stream_url, "sdp": offer.sdp},
-                    ssl=self.ssl_context
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"服务器响应错误 {response.status}: {error_text}")
-                        return False
+                # 解析响应（只读取一次响应体，解析失败时复用同一份数据）
+                raw = await response.read()
+                try:
+                    answer_data = _json_loads(raw)
+                except ValueError:
+                    # JSONDecodeError及非UTF-8响应的UnicodeDecodeError都是ValueError
+                    logger.error(f"无法解析JSON响应: {raw[:200].decode('utf-8', errors='replace')}...")
+                    return False
                     
-                    # 解析响应
-                    try:
-                        answer_data = await response.json()
-                        if "code" in answer_data and answer_data["code"] != 0:
-                            logger.error(f"SRS服务器返回错误码: {answer_data['code']}, 消息: {answer_data.get('msg', '未知错误')}")
-                            return False
-                            
-                        sdp = answer_data.get("sdp")
-                        if not sdp:
-                            logger.error("服务器响应中缺少SDP")
-                            return False
-                            
-                        # 设置远程描述
-                        answer = RTCSessionDescription(sdp=sdp, type="answer")
-                        await self.peer_connection.setRemoteDescription(answer)
-                        logger.info("成功设置远程描述")
-                        
-                        # 等待连接建立
-                        count = 0
-                        while count < self.timeout:
-                            if self.peer_connection.iceConnectionState == "connected" or \
-                               self.peer_connection.iceConnectionState == "completed":
-                                logger.info(f"连接成功建立，耗时: {time.time() - self.connection_start_time:.2f}秒")
-                                return True
-                                
-                            if self.peer_connection.iceConnectionState == "failed":
-                                logger.error("ICE连接失败")
-                                return False
-                                
-                            await asyncio.sleep(1)
-                            count += 1
-                            if count % 5 == 0:
-                                logger.info(f"等待连接... ({count}秒)")
-                                
-                        logger.error(f"连接超时，{self.timeout}秒后未建立连接")
-                        return False
-                        
-                    except json.JSONDecodeError:
-                        response_text = await response.text()
-                        logger.error(f"无法解析JSON响应: {response_text[:200]}...")
-                        return False
-                        
-            except Exception as e:
-                logger.error(f"连接过程中出错: {e}")
-                return False
+                if "code" in answer_data and answer_data["code"] != 0:
+                    logger.error(f"SRS服务器返回错误码: {answer_data['code']}, 消息: {answer_data.get('msg', '未知错误')}")
+                    return False
+                    
+                sdp = answer_data.get("sdp")
+                if not sdp:
+                    logger.error("服务器响应中缺少SDP")
+                    return False
+                    
+                # 设置远程描述
+                answer = RTCSessionDescription(sdp=sdp, type="answer")
+                await self.peer_connection.setRemoteDescription(answer)
+                logger.info("成功设置远程描述")
+                
+                # 等待连接建立
+                return await self.wait_for_connection()
+                    
+        except Exception as e:
+            logger.error(f"连接过程中出错: {e}")
+            return False
     
     async def wait_for_connection(self, timeout=None):
         """等待连接建立或超时"""
         if timeout is None:
             timeout = self.timeout
             
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if self.peer_connection and (
-                self.peer_connection.iceConnectionState == "connected" or
-                self.peer_connection.iceConnectionState == "completed"
-            ):
-                return True
-                
-            if self.peer_connection and self.peer_connection.iceConnectionState == "failed":
-                return False
-                
-            await asyncio.sleep(0.5)
+        try:
+            await asyncio.wait_for(self._ice_ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"连接超时，{timeout}秒后未建立连接")
+            return False
             
-        return False
+        if self._ice_failed:
+            logger.error("ICE连接失败")
+            return False
+            
+        logger.info(f"连接成功建立，耗时: {time.monotonic() - self.connection_start_time:.2f}秒")
+        return True
     
     async def close(self):
         """关闭连接并清理资源"""
@@ -288,6 +436,13 @@ class SRSWebRTCClient:
         self.closed = True
         logger.info("正在关闭连接...")
         
+        # 取消仍在运行的事件处理任务（当前任务可能就是其中之一，需排除）
+        current = asyncio.current_task()
+        pending = [t for t in self._handler_tasks if t is not current]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        
         # 关闭录制器（如果有）
         if self.recorder:
             await self.recorder.stop()
@@ -296,15 +451,22 @@ class SRSWebRTCClient:
         if self.peer_connection:
             await self.peer_connection.close()
             
+        # 关闭HTTP会话
+        if self._session:
+            await self._session.close()
+            
         # 输出连接统计信息
+        now = time.monotonic()
         if self.connection_start_time:
-            duration = time.time() - self.connection_start_time
+            duration = now - self.connection_start_time
             logger.info(f"连接总时长: {duration:.2f}秒")
             
-        for kind, stats in self.track_stats.items():
-            if "start_time" in stats:
-                track_duration = time.time() - stats["start_time"]
-                logger.info(f"{kind}轨道播放时长: {track_duration:.2f}秒")
+        parts = [
+            f"{kind}={now - stats['start_time']:.2f}秒"
+            for kind, stats in self.track_stats.items() if "start_time" in stats
+        ]
+        if parts:
+            logger.info("轨道播放时长: " + ", ".join(parts))
 
 async def run_webrtc_client(webpage_url, stream_url=None, record=False, output_file=None, timeout=60):
     """运行WebRTC客户端"""
@@ -320,7 +482,11 @@ async def run_webrtc_client(webpage_url, stream_url=None, record=False, output_f
             
         # 等待指定的时间
         logger.info(f"将保持连接 {timeout} 秒...")
-        await asyncio.sleep(timeout)
+        try:
+            await asyncio.wait_for(client._disconnected.wait(), timeout=timeout)
+            logger.info("连接已断开，结束播放")
+        except asyncio.TimeoutError:
+            pass
         
     except KeyboardInterrupt:
         logger.info("用户中断，正在关闭连接...")
@@ -357,6 +523,13 @@ if __name__ == "__main__":
     # 为Windows设置事件循环策略
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    else:
+        # 其他平台优先使用uvloop事件循环（可选依赖）
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
     
     # 运行主函数
     asyncio.run(main())
\ No newline at end of file